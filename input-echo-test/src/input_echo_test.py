@@ -35,19 +35,39 @@ def capture_output():
 # Config parsing
 # ---------------------------------------------------------------------------
 
+_PREFIX = "TEST_"
+_PLEN = len(_PREFIX)
+_SECRET_PREFIX = "SECRET_"
+_SECRET_PLEN = len(_SECRET_PREFIX)
+
+
+def _is_empty(value):
+    return value is None or value.strip() == "" or value == "None"
+
+
+def _collect_test_env():
+    """
+    Walk the environment once, collecting all TEST_* parameters (lowercased,
+    prefix stripped), then pick out the names of those that are empty.
+    Returns (params, empty_params).
+    """
+    params = {key[_PLEN:].lower(): value for key, value in os.environ.items() if key[:_PLEN] == _PREFIX}
+    empty_params = [name for name, value in params.items() if _is_empty(value)]
+    return params, empty_params
+
+
 def parse_config():
     """
     Collect all TEST_* environment variables and provenance.
     Returns a dict with all TEST_* keys (lowercased, prefix stripped) as
-    config parameters, plus provenance from SPECIAL_SOURCE_FILE.
+    config parameters, the names of the empty ones, plus provenance from
+    SPECIAL_SOURCE_FILE.
     """
-    params = {}
-    for key, value in os.environ.items():
-        if key.startswith("TEST_"):
-            params[key[len("TEST_"):].lower()] = value
+    params, empty_params = _collect_test_env()
 
     return {
         "params": params,
+        "empty_params": empty_params,
         "provenance": os.environ.get("SPECIAL_SOURCE_FILE", "unknown"),
         "create_issue": os.environ.get("SPECIAL_CREATE_ISSUE", "false").lower() == "true",
     }
@@ -87,9 +107,10 @@ def get_env_test(params):
     Check that at least one TEST_* parameter is configured.
     Records all parameters and their count as test case properties.
     """
-    start = time.time()
+    start = time.perf_counter()
     with capture_output() as (out, err):
         properties = dict(params)
+        properties["test_parameter_count"] = str(len(params))
 
         for key, value in params.items():
             print(f"Found: TEST_{key.upper()} = {value}")
@@ -104,7 +125,7 @@ def get_env_test(params):
             failure_message = None
             failure_text = None
 
-    duration = time.time() - start
+    duration = time.perf_counter() - start
     return _result(
         "get_env_test",
         failure_message=failure_message,
@@ -116,17 +137,17 @@ def get_env_test(params):
     )
 
 
-def check_emptiness_test(params):
+def check_emptiness_test(params, empty_vars=None):
     """
     Check that none of the TEST_* parameters have an empty or None value.
+    empty_vars may be passed in when already computed (see parse_config).
     """
-    start = time.time()
+    start = time.perf_counter()
     with capture_output() as (out, err):
-        empty_vars = []
-        for key, value in params.items():
-            if value is None or value.strip() == "" or value == "None":
-                empty_vars.append(key)
-                print(f"Found empty value: TEST_{key.upper()} = {value!r}")
+        if empty_vars is None:
+            empty_vars = [key for key, value in params.items() if _is_empty(value)]
+        for key in empty_vars:
+            print(f"Found empty value: TEST_{key.upper()} = {params[key]!r}")
 
         print(f"empty_test_parameter_count: {len(empty_vars)}")
 
@@ -137,7 +158,7 @@ def check_emptiness_test(params):
             failure_message = None
             failure_text = None
 
-    duration = time.time() - start
+    duration = time.perf_counter() - start
     return _result(
         "check_emptiness_test",
         failure_message=failure_message,
@@ -153,11 +174,11 @@ def check_secrets_test():
     Check that at least one SECRET_* environment variable is configured and non-empty.
     Lists the names of found secrets in stdout — never their values.
     """
-    start = time.time()
+    start = time.perf_counter()
     with capture_output() as (out, err):
         secret_keys = [
             key for key, value in os.environ.items()
-            if key.startswith("SECRET_") and value and value.strip() and value != "None"
+            if key[:_SECRET_PLEN] == _SECRET_PREFIX and value and value.strip() and value != "None"
         ]
 
         for key in sorted(secret_keys):
@@ -173,7 +194,7 @@ def check_secrets_test():
             failure_message = None
             failure_text = None
 
-    duration = time.time() - start
+    duration = time.perf_counter() - start
     return _result(
         "check_secrets_test",
         failure_message=failure_message,
@@ -188,6 +209,17 @@ def check_secrets_test():
 # JUnit report
 # ---------------------------------------------------------------------------
 
+def _write_report_file(path, data):
+    """Write data (bytes) to path through a raw file descriptor."""
+    fd = os.open(path, os.O_WRONLY | os.O_CREAT | os.O_TRUNC, 0o644)
+    try:
+        view = memoryview(data)
+        while view:
+            view = view[os.write(fd, view):]
+    finally:
+        os.close(fd)
+
+
 def create_junit_report(suite_name, results, output_file, provenance,
                         suite_properties=None):
     suite = TestSuite(suite_name)
@@ -195,18 +227,19 @@ def create_junit_report(suite_name, results, output_file, provenance,
     if suite_properties is None:
         suite_properties = {}
     total_time = 0.0
-    added_properties = set()
+
+    suite_props = {}  # key -> value of the first case that reported it
+    for result in results:
+        for key, value in result["properties"].items():
+            suite_props.setdefault(key, value)
+    for key, value in suite_props.items():
+        suite.add_property(key, value)
 
     for result in results:
         case = TestCase(result["case_name"], classname=suite_name)
         case.time = result["duration"]
         total_time += result["duration"]
 
-        for key, value in result["properties"].items():
-            if key not in added_properties:
-                suite.add_property(key, value)
-                added_properties.add(key)
-
         if result["skipped"]:
             case.result = [Skipped(message=result["skipped_message"])]
         else:
@@ -230,7 +263,9 @@ def create_junit_report(suite_name, results, output_file, provenance,
     suite.time = total_time
     xml = JUnitXml()
     xml.add_testsuite(suite)
-    xml.write(output_file)
+    buf = io.BytesIO()
+    xml.write(buf)
+    _write_report_file(output_file, buf.getvalue())
 
 
 # ---------------------------------------------------------------------------
@@ -252,7 +287,11 @@ if __name__ == "__main__":
             check_secrets_test(),
         ]
     else:
-        results = [result_get_env, check_emptiness_test(params), check_secrets_test()]
+        results = [
+            result_get_env,
+            check_emptiness_test(params, config["empty_params"]),
+            check_secrets_test(),
+        ]
 
     report_path = f"/reports/{suite_name}_report.xml"
     create_junit_report(
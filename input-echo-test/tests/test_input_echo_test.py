@@ -63,6 +63,14 @@ class TestParseConfig:
         config = parse_config()
         assert config["params"] == {}
 
+    def test_collects_empty_param_names(self, monkeypatch):
+        self._clean_test_vars(monkeypatch)
+        monkeypatch.setenv("TEST_URLS", "https://example.com")
+        monkeypatch.setenv("TEST_BLANK", "   ")
+        monkeypatch.setenv("TEST_NONE", "None")
+        config = parse_config()
+        assert sorted(config["empty_params"]) == ["blank", "none"]
+
     def test_provenance_from_special_source_file(self, monkeypatch):
         monkeypatch.setenv("SPECIAL_SOURCE_FILE", "my-config.yaml")
         assert parse_config()["provenance"] == "my-config.yaml"
@@ -107,6 +115,10 @@ class TestGetEnvTest:
         result = get_env_test({"urls": "https://example.com"})
         assert result["properties"]["urls"] == "https://example.com"
 
+    def test_parameter_count_included_as_property(self):
+        result = get_env_test({"urls": "https://example.com", "timeout": "30"})
+        assert result["properties"]["test_parameter_count"] == "2"
+
     def test_failure_goes_to_stderr(self):
         result = get_env_test({})
         assert result["stderr"] != ""
@@ -159,6 +171,11 @@ class TestCheckEmptinessTest:
         result = check_emptiness_test({})
         assert result["case_name"] == "check_emptiness_test"
 
+    def test_uses_precomputed_empty_vars(self):
+        result = check_emptiness_test({"urls": "", "timeout": "30"}, ["urls"])
+        assert result["failure_text"] == "urls"
+        assert "TEST_URLS = ''" in result["stdout"]
+
     def test_failure_text_lists_empty_vars_sorted(self):
         result = check_emptiness_test({"b_param": "", "a_param": ""})
         lines = result["failure_text"].splitlines()
@@ -320,6 +337,14 @@ class TestCreateJunitReport:
         for suite in xml:
             assert abs(suite.time - 1.0) < 0.001
 
+    def test_overwrites_existing_report(self, tmp_path):
+        out = tmp_path / "report.xml"
+        out.write_text("x" * 100000)
+        create_junit_report("suite", [self._result()], str(out), "prov")
+        content = out.read_text()
+        assert content.startswith("<?xml")
+        assert content.rstrip().endswith("</testsuites>")
+
     def test_empty_results_still_creates_file(self, tmp_path):
         out = str(tmp_path / "report.xml")
         create_junit_report("suite", [], out, "prov")
@@ -10,25 +10,49 @@ Run with (from resource-availability/ root):
 import socket
 import sys
 import os
+import threading
+import time
 import pytest
-from unittest.mock import patch, MagicMock
+from unittest.mock import ANY, patch, MagicMock
+
+import dns.resolver
+import requests
 
 sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "src"))
 
+import resource_availability
 from resource_availability import (
     check_dns,
     check_url,
     run_dns_test,
     run_availability_test,
     run_tests_for_url,
+    run_all,
     skipped_test,
     parse_config,
     create_junit_report,
     _parse_list_env,
     _parse_int_env,
+    _parse_bool_env,
+    _cached_create_connection,
+    _resolve,
+    _DNS_CACHE,
 )
 
 
+@pytest.fixture(autouse=True)
+def clear_dns_cache():
+    _DNS_CACHE.clear()
+    yield
+    _DNS_CACHE.clear()
+
+
+@pytest.fixture(autouse=True)
+def no_public_nameservers(monkeypatch):
+    # Keep check_dns on the (patched) system resolver unless a test opts in
+    monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ())
+
+
 # ---------------------------------------------------------------------------
 # Helpers
 # ---------------------------------------------------------------------------
@@ -41,28 +65,178 @@ def make_response(status_code, headers=None, url="https://example.com"):
     return resp
 
 
+def make_addrinfo(*ips):
+    return [
+        (socket.AF_INET6 if ":" in ip else socket.AF_INET, socket.SOCK_STREAM, socket.IPPROTO_TCP, "", (ip, 0))
+        for ip in ips
+    ]
+
+
 # ---------------------------------------------------------------------------
 # check_dns
 # ---------------------------------------------------------------------------
 
 class TestCheckDns:
     def test_successful_resolution(self):
-        with patch("socket.gethostbyname", return_value="93.184.216.34"):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")):
             ip, error = check_dns("example.com")
         assert ip == "93.184.216.34"
         assert error is None
 
     def test_failed_resolution(self):
-        with patch("socket.gethostbyname", side_effect=socket.gaierror("Name or service not known")):
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Name or service not known")):
             ip, error = check_dns("nonexistent.invalid")
         assert ip is None
         assert "Name or service not known" in error
 
+    def test_ipv6_only_host_resolves(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("2606:2800:220:1::1")):
+            ip, error = check_dns("example.com")
+        assert ip == "2606:2800:220:1::1"
+        assert error is None
+
+    def test_system_lookup_requests_stream_sockets(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")) as mock_resolve:
+            check_dns("example.com")
+        mock_resolve.assert_called_once_with("example.com", None, type=socket.SOCK_STREAM)
+
     def test_none_hostname_returns_error(self):
         ip, error = check_dns(None)
         assert ip is None
         assert error == "Could not extract hostname from URL"
 
+    def test_repeat_lookup_served_from_cache(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")) as mock_resolve:
+            check_dns("example.com")
+            ip, error = check_dns("example.com")
+        assert ip == "93.184.216.34"
+        assert mock_resolve.call_count == 1
+
+    def test_expired_entry_is_resolved_again(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_DNS_TTL", 0.0)
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")) as mock_resolve:
+            check_dns("example.com")
+            check_dns("example.com")
+        assert mock_resolve.call_count == 2
+
+    def test_failed_lookup_is_not_cached(self):
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Name or service not known")):
+            check_dns("example.com")
+        assert "example.com" not in _DNS_CACHE
+
+    def test_public_nameserver_answer_used_when_system_fails(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("1.1.1.1",))
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Temporary failure")), \
+             patch("resource_availability._resolve_public", return_value=make_addrinfo("93.184.216.34")):
+            ip, error = check_dns("example.com")
+        assert ip == "93.184.216.34"
+        assert error is None
+
+    def test_first_answer_wins(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("1.1.1.1",))
+        release = threading.Event()
+        def slow_system(hostname, port, type):
+            release.wait(5)
+            return make_addrinfo("10.0.0.1")
+        try:
+            with patch("socket.getaddrinfo", side_effect=slow_system), \
+                 patch("resource_availability._resolve_public", return_value=make_addrinfo("93.184.216.34")):
+                ip, error = check_dns("example.com")
+        finally:
+            release.set()
+        assert ip == "93.184.216.34"
+
+    def test_public_answer_is_not_cached_for_connections(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("1.1.1.1",))
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Temporary failure")), \
+             patch("resource_availability._resolve_public", return_value=make_addrinfo("93.184.216.34")):
+            check_dns("example.com")
+        assert "example.com" not in _DNS_CACHE
+
+    def test_system_answer_is_cached_after_public_answer_wins(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("1.1.1.1",))
+        release = threading.Event()
+        resolved = threading.Event()
+        def slow_system(hostname, port, type):
+            release.wait(5)
+            return make_addrinfo("10.0.0.1")
+        with patch("socket.getaddrinfo", side_effect=slow_system), \
+             patch("resource_availability._resolve_public", return_value=make_addrinfo("93.184.216.34")), \
+             patch("resource_availability._cache_addrinfo", side_effect=lambda *a: resolved.set()) as mock_cache:
+            check_dns("example.com")
+            release.set()
+            assert resolved.wait(5)
+        mock_cache.assert_called_once_with("example.com", make_addrinfo("10.0.0.1"))
+
+    def test_losing_lookups_do_not_block_exit(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")), \
+             patch("threading.Thread") as mock_thread:
+            resource_availability._start_lookup(socket.getaddrinfo, "example.com")
+        assert mock_thread.call_args.kwargs["daemon"] is True
+
+    def test_all_resolvers_failing_reports_system_error(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("1.1.1.1", "8.8.8.8"))
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Name or service not known")), \
+             patch("resource_availability._resolve_public", side_effect=dns.resolver.NXDOMAIN()):
+            ip, error = check_dns("nonexistent.invalid")
+        assert ip is None
+        assert "Name or service not known" in error
+
+    def test_public_nameserver_queried_for_a_record(self, monkeypatch):
+        monkeypatch.setattr(resource_availability, "_PUBLIC_NAMESERVERS", ("9.9.9.9",))
+        answer = [MagicMock(address="93.184.216.34")]
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Temporary failure")), \
+             patch("dns.resolver.Resolver.resolve", return_value=answer) as mock_resolve:
+            ip, _ = check_dns("example.com")
+        assert ip == "93.184.216.34"
+        assert mock_resolve.call_args.args[:2] == ("example.com", "A")
+
+
+# ---------------------------------------------------------------------------
+# _cached_create_connection
+# ---------------------------------------------------------------------------
+
+class TestCachedCreateConnection:
+    def test_connects_to_ip_resolved_by_check_dns(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")) as mock_resolve, \
+             patch("resource_availability._urllib3_create_connection") as mock_connect:
+            check_dns("example.com")
+            _cached_create_connection(("example.com", 443), timeout=5)
+        assert mock_resolve.call_count == 1
+        mock_connect.assert_called_once_with(("93.184.216.34", 443), timeout=5)
+
+    def test_connect_failure_invalidates_cache_entry(self):
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")), \
+             patch("resource_availability._urllib3_create_connection", side_effect=OSError("refused")):
+            with pytest.raises(OSError):
+                _cached_create_connection(("example.com", 443))
+        assert "example.com" not in _DNS_CACHE
+
+    def test_falls_through_to_next_cached_address(self):
+        infos = make_addrinfo("2606:2800:220:1::1", "93.184.216.34")
+        with patch("socket.getaddrinfo", return_value=infos), \
+             patch("urllib3.util.connection.allowed_gai_family", return_value=socket.AF_UNSPEC), \
+             patch("resource_availability._urllib3_create_connection",
+                   side_effect=[OSError("unreachable"), "sock"]) as mock_connect:
+            assert _cached_create_connection(("example.com", 443)) == "sock"
+        assert [c.args[0] for c in mock_connect.call_args_list] == [
+            ("2606:2800:220:1::1", 443), ("93.184.216.34", 443),
+        ]
+
+    def test_ipv6_addresses_skipped_without_ipv6_support(self):
+        infos = make_addrinfo("2606:2800:220:1::1", "93.184.216.34")
+        with patch("socket.getaddrinfo", return_value=infos), \
+             patch("urllib3.util.connection.allowed_gai_family", return_value=socket.AF_INET), \
+             patch("resource_availability._urllib3_create_connection") as mock_connect:
+            _cached_create_connection(("example.com", 443))
+        mock_connect.assert_called_once_with(("93.184.216.34", 443))
+
+    def test_unresolvable_host_delegates_to_urllib3(self):
+        with patch("socket.getaddrinfo", side_effect=socket.gaierror("Name or service not known")), \
+             patch("resource_availability._urllib3_create_connection") as mock_connect:
+            _cached_create_connection(("nonexistent.invalid", 443))
+        mock_connect.assert_called_once_with(("nonexistent.invalid", 443))
+
 
 # ---------------------------------------------------------------------------
 # check_url
@@ -70,7 +244,7 @@ class TestCheckDns:
 
 class TestCheckUrl:
     def test_200_response(self):
-        with patch("requests.Session.get", return_value=make_response(200)):
+        with patch("requests.Session.head", return_value=make_response(200)):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=0
             )
@@ -80,7 +254,7 @@ class TestCheckUrl:
 
     def test_timeout_returns_error(self):
         import requests as req
-        with patch("requests.Session.get", side_effect=req.exceptions.Timeout):
+        with patch("requests.Session.head", side_effect=req.exceptions.Timeout):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=5, max_redirects=0
             )
@@ -89,7 +263,7 @@ class TestCheckUrl:
 
     def test_connection_error(self):
         import requests as req
-        with patch("requests.Session.get", side_effect=req.exceptions.ConnectionError("refused")):
+        with patch("requests.Session.head", side_effect=req.exceptions.ConnectionError("refused")):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=5, max_redirects=0
             )
@@ -99,7 +273,7 @@ class TestCheckUrl:
     def test_redirect_within_same_scheme_is_followed(self):
         redirect_resp = make_response(301, headers={"Location": "https://example.com/new"})
         final_resp = make_response(200)
-        with patch("requests.Session.get", side_effect=[redirect_resp, final_resp]):
+        with patch("requests.Session.head", side_effect=[redirect_resp, final_resp]):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=5
             )
@@ -107,9 +281,19 @@ class TestCheckUrl:
         assert error is None
         assert crossed is False
 
+    def test_relative_redirect_resolved_against_current_url(self):
+        redirect_resp = make_response(302, headers={"Location": "/new"})
+        with patch("requests.Session.head", side_effect=[redirect_resp, make_response(200)]):
+            status, final_url, elapsed, error, crossed = check_url(
+                "https://example.com/old/page", timeout=10, max_redirects=5
+            )
+        assert status == 200
+        assert final_url == "https://example.com/new"
+        assert crossed is False
+
     def test_redirect_limit_exceeded_returns_error(self):
         redirect_resp = make_response(301, headers={"Location": "https://example.com/loop"})
-        with patch("requests.Session.get", return_value=redirect_resp):
+        with patch("requests.Session.head", return_value=redirect_resp):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=0
             )
@@ -117,7 +301,7 @@ class TestCheckUrl:
 
     def test_http_to_https_redirect_crosses_boundary(self):
         redirect_resp = make_response(301, headers={"Location": "https://example.com/"})
-        with patch("requests.Session.get", return_value=redirect_resp):
+        with patch("requests.Session.head", return_value=redirect_resp):
             status, final_url, elapsed, error, crossed = check_url(
                 "http://example.com", timeout=10, max_redirects=5
             )
@@ -127,7 +311,7 @@ class TestCheckUrl:
 
     def test_https_to_http_redirect_crosses_boundary(self):
         redirect_resp = make_response(301, headers={"Location": "http://example.com/"})
-        with patch("requests.Session.get", return_value=redirect_resp):
+        with patch("requests.Session.head", return_value=redirect_resp):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=5
             )
@@ -135,7 +319,7 @@ class TestCheckUrl:
         assert final_url.startswith("http://")
 
     def test_redirect_missing_location_header_returns_error(self):
-        with patch("requests.Session.get", return_value=make_response(301, headers={})):
+        with patch("requests.Session.head", return_value=make_response(301, headers={})):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=5
             )
@@ -143,7 +327,7 @@ class TestCheckUrl:
         assert "no Location header" in error
 
     def test_500_returns_unexpected_status_error(self):
-        with patch("requests.Session.get", return_value=make_response(500)):
+        with patch("requests.Session.head", return_value=make_response(500)):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com", timeout=10, max_redirects=0
             )
@@ -151,15 +335,82 @@ class TestCheckUrl:
         assert "Unexpected status code" in error
 
     def test_404_returns_error(self):
-        with patch("requests.Session.get", return_value=make_response(404)):
+        with patch("requests.Session.head", return_value=make_response(404)):
             status, final_url, elapsed, error, crossed = check_url(
                 "https://example.com/missing", timeout=10, max_redirects=0
             )
         assert status == 404
         assert error is not None
 
+    def test_sessions_share_connection_pools(self):
+        sessions = []
+        def fake_head(session, url, **kwargs):
+            sessions.append(session)
+            return make_response(200)
+        with patch.object(requests.Session, "head", autospec=True, side_effect=fake_head):
+            check_url("https://example.com", timeout=10, max_redirects=0)
+            check_url("https://example.org", timeout=10, max_redirects=0)
+        assert sessions[0] is not sessions[1]
+        assert sessions[0].get_adapter("https://example.com") is sessions[1].get_adapter("https://example.org")
+
+    def test_cookies_carry_between_hops_but_not_between_checks(self):
+        seen = []
+        def fake_head(session, url, **kwargs):
+            seen.append((url, session.cookies.get("gate")))
+            if url.endswith("/a"):
+                session.cookies.set("gate", "1")
+                return make_response(302, headers={"Location": "/b"})
+            return make_response(200)
+        with patch.object(requests.Session, "head", autospec=True, side_effect=fake_head):
+            check_url("https://example.com/a", timeout=10, max_redirects=1)
+            check_url("https://example.com/b", timeout=10, max_redirects=0)
+        assert seen == [
+            ("https://example.com/a", None),
+            ("https://example.com/b", "1"),
+            ("https://example.com/b", None),
+        ]
+
+    def test_verify_ssl_passed_per_hop(self):
+        redirect_resp = make_response(301, headers={"Location": "https://example.com/new"})
+        with patch("requests.Session.head", side_effect=[redirect_resp, make_response(200)]) as mock_get:
+            check_url("https://example.com", timeout=10, max_redirects=5, verify_ssl=False)
+        assert [c.kwargs["verify"] for c in mock_get.call_args_list] == [False, False]
+
+    def test_head_405_falls_back_to_streamed_get(self):
+        head_resp = make_response(405)
+        get_resp = make_response(200)
+        with patch("requests.Session.head", return_value=head_resp), \
+             patch("requests.Session.get", return_value=get_resp) as mock_get:
+            status, _, _, error, _ = check_url("https://example.com", timeout=10, max_redirects=0)
+        assert status == 200
+        assert error is None
+        assert mock_get.call_args.kwargs["stream"] is True
+        head_resp.close.assert_called_once()
+        get_resp.close.assert_called_once()
+
+    def test_every_hop_response_is_closed(self):
+        redirect_resp = make_response(301, headers={"Location": "https://example.com/new"})
+        final_resp = make_response(200)
+        with patch("requests.Session.head", side_effect=[redirect_resp, final_resp]):
+            check_url("https://example.com", timeout=10, max_redirects=5)
+        redirect_resp.close.assert_called_once()
+        final_resp.close.assert_called_once()
+
+    def test_head_501_falls_back_to_get(self):
+        with patch("requests.Session.head", return_value=make_response(501)), \
+             patch("requests.Session.get", return_value=make_response(200)) as mock_get:
+            status, _, _, _, _ = check_url("https://example.com", timeout=10, max_redirects=0)
+        assert status == 200
+        mock_get.assert_called_once()
+
+    def test_head_success_does_not_issue_get(self):
+        with patch("requests.Session.head", return_value=make_response(200)), \
+             patch("requests.Session.get") as mock_get:
+            check_url("https://example.com", timeout=10, max_redirects=0)
+        mock_get.assert_not_called()
+
     def test_elapsed_is_non_negative(self):
-        with patch("requests.Session.get", return_value=make_response(200)):
+        with patch("requests.Session.head", return_value=make_response(200)):
             _, _, elapsed, _, _ = check_url("https://example.com", timeout=10, max_redirects=0)
         assert elapsed >= 0
 
@@ -186,35 +437,35 @@ class TestSkippedTest:
 class TestRunDnsTest:
     def test_success_has_no_failure(self):
         with patch("resource_availability.check_dns", return_value=("1.2.3.4", None)):
-            result = run_dns_test("https://example.com")
+            result = run_dns_test("https://example.com", "example.com")
         assert result["failure_message"] is None
         assert result["error"] is None
 
     def test_success_stdout_contains_ip(self):
         with patch("resource_availability.check_dns", return_value=("1.2.3.4", None)):
-            result = run_dns_test("https://example.com")
+            result = run_dns_test("https://example.com", "example.com")
         assert "1.2.3.4" in result["stdout"]
 
     def test_failure_sets_failure_message(self):
         with patch("resource_availability.check_dns", return_value=(None, "Name not known")):
-            result = run_dns_test("https://nonexistent.invalid")
+            result = run_dns_test("https://nonexistent.invalid", "nonexistent.invalid")
         assert result["failure_message"] is not None
         assert "DNS resolution failed" in result["failure_message"]
 
     def test_failure_puts_message_in_stdout(self):
         with patch("resource_availability.check_dns", return_value=(None, "Name not known")):
-            result = run_dns_test("https://nonexistent.invalid")
+            result = run_dns_test("https://nonexistent.invalid", "nonexistent.invalid")
         assert "Name not known" in result["stdout"]
         assert result["stderr"] == ""
 
     def test_properties_contain_hostname(self):
         with patch("resource_availability.check_dns", return_value=("1.2.3.4", None)):
-            result = run_dns_test("https://example.com")
+            result = run_dns_test("https://example.com", "example.com")
         assert result["properties"]["hostnames"] == "example.com"
 
     def test_properties_contain_url(self):
         with patch("resource_availability.check_dns", return_value=("1.2.3.4", None)):
-            result = run_dns_test("https://example.com")
+            result = run_dns_test("https://example.com", "example.com")
         assert result["properties"]["urls"] == "https://example.com"
 
 
@@ -225,56 +476,83 @@ class TestRunDnsTest:
 class TestRunAvailabilityTest:
     def test_https_success(self):
         with patch("resource_availability.check_url", return_value=(200, "https://example.com", 0.1, None, False)):
-            result = run_availability_test("https://example.com", "https", timeout=10, max_redirects=0)
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0)
         assert result["failure_message"] is None
         assert result["error"] is None
         assert "OK" in result["stdout"]
 
     def test_http_success(self):
         with patch("resource_availability.check_url", return_value=(200, "http://example.com", 0.05, None, False)):
-            result = run_availability_test("http://example.com", "http", timeout=10, max_redirects=0)
+            result = run_availability_test("http://example.com", "http://example.com", "http", timeout=10, max_redirects=0)
         assert result["failure_message"] is None
 
     def test_connection_error_sets_failure(self):
         with patch("resource_availability.check_url", return_value=(None, "https://example.com", 0.5, "Connection refused", False)):
-            result = run_availability_test("https://example.com", "https", timeout=10, max_redirects=0)
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0)
         assert result["failure_message"] is not None
         assert "Connection refused" in result["failure_text"]
 
+    def test_failure_stdout_includes_request_context(self):
+        with patch("resource_availability.check_url", return_value=(None, "https://example.com", 0.5, "Connection refused", False)):
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=2)
+        assert result["stdout"].splitlines()[1:] == [
+            "Checking HTTPS availability for: https://example.com",
+            "Timeout: 10s, Max redirects: 2, Verify SSL: True",
+            "Availability check failed: Connection refused",
+        ]
+        assert result["failure_message"] == "HTTPS availability check failed"
+
+    def test_success_stdout_has_no_request_context(self):
+        with patch("resource_availability.check_url", return_value=(200, "https://example.com", 0.1, None, False)):
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0)
+        assert "Checking" not in result["stdout"]
+        assert result["stdout"].splitlines()[-1] == "OK: HTTPS available, status 200 in 0.100s"
+
     def test_elapsed_gte_timeout_sets_error(self):
         with patch("resource_availability.check_url", return_value=(None, "https://example.com", 10.0, None, False)):
-            result = run_availability_test("https://example.com", "https", timeout=10, max_redirects=0)
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0)
         assert result["error"] is not None
         assert "exceeded timeout" in result["error"]
 
+    def test_elapsed_gte_timeout_details_go_to_stderr(self):
+        with patch("resource_availability.check_url", return_value=(None, "https://example.com", 10.0, None, False)):
+            result = run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0)
+        assert result["stderr"].splitlines() == [
+            "Checking HTTPS availability for: https://example.com",
+            "Timeout: 10s, Max redirects: 0, Verify SSL: True",
+            "Response time 10.000s exceeded timeout of 10s",
+        ]
+        assert "exceeded timeout" not in result["stdout"]
+
     def test_scheme_boundary_cross_is_not_a_failure(self):
         with patch("resource_availability.check_url", return_value=(301, "https://example.com/", 0.05, None, True)):
-            result = run_availability_test("http://example.com", "http", timeout=10, max_redirects=0)
+            result = run_availability_test("http://example.com", "http://example.com", "http", timeout=10, max_redirects=0)
         assert result["failure_message"] is None
         assert result["error"] is None
 
     def test_scheme_boundary_cross_mentioned_in_stdout(self):
         with patch("resource_availability.check_url", return_value=(301, "https://example.com/", 0.05, None, True)):
-            result = run_availability_test("http://example.com", "http", timeout=10, max_redirects=0)
+            result = run_availability_test("http://example.com", "http://example.com", "http", timeout=10, max_redirects=0)
         assert "redirects to" in result["stdout"].lower()
 
     def test_verify_ssl_passed_to_check_url(self):
         captured = {}
-        def fake_check_url(url, timeout, max_redirects, verify_ssl):
+        def fake_check_url(url, timeout, max_redirects, verify_ssl, initial_scheme=None):
             captured["verify_ssl"] = verify_ssl
             return 200, url, 0.1, None, False
         with patch("resource_availability.check_url", side_effect=fake_check_url):
-            run_availability_test("https://example.com", "https", timeout=10, max_redirects=0, verify_ssl=False)
+            run_availability_test("https://example.com", "https://example.com", "https", timeout=10, max_redirects=0, verify_ssl=False)
         assert captured["verify_ssl"] is False
 
-    def test_target_url_uses_specified_scheme(self):
+    def test_target_url_and_scheme_passed_to_check_url(self):
         captured = {}
-        def fake_check_url(url, timeout, max_redirects, verify_ssl):
+        def fake_check_url(url, timeout, max_redirects, verify_ssl, initial_scheme=None):
             captured["url"] = url
+            captured["initial_scheme"] = initial_scheme
             return 200, url, 0.1, None, False
         with patch("resource_availability.check_url", side_effect=fake_check_url):
-            run_availability_test("https://example.com", "http", timeout=10, max_redirects=0)
-        assert captured["url"].startswith("http://")
+            run_availability_test("https://example.com", "http://example.com", "http", timeout=10, max_redirects=0)
+        assert captured == {"url": "http://example.com", "initial_scheme": "http"}
 
 
 # ---------------------------------------------------------------------------
@@ -282,6 +560,11 @@ class TestRunAvailabilityTest:
 # ---------------------------------------------------------------------------
 
 class TestRunTestsForUrl:
+    @pytest.fixture(autouse=True)
+    def system_lookup(self):
+        with patch("resource_availability._resolve", return_value=make_addrinfo("93.184.216.34")) as mock_resolve:
+            yield mock_resolve
+
     def _config(self, **overrides):
         cfg = {"timeout": 10, "max_redirects": 0, "verify_ssl": True,
                "check_http": False, "check_https": True}
@@ -304,11 +587,13 @@ class TestRunTestsForUrl:
         return {"case_name": f"{scheme}_availability [{url}]", "duration": 0.1,
                 "error": None, "failure_message": None, "failure_text": None,
                 "properties": {"verify_ssl": "True"},
-                "skipped": False, "skipped_message": "", "stdout": "OK", "stderr": ""}
+                "skipped": False, "skipped_message": "", "stdout": "OK", "stderr": "",
+                "status_code": 200, "crossed_scheme_boundary": False}
 
     def test_dns_failure_skips_https(self):
         url = "https://x.com"
-        with patch("resource_availability.run_dns_test", return_value=self._dns_fail(url)):
+        with patch("resource_availability.run_dns_test", return_value=self._dns_fail(url)), \
+             patch("resource_availability.run_availability_test", return_value=self._avail_ok(url, "https")):
             results = run_tests_for_url(url, self._config())
         skipped = [r for r in results if r["skipped"]]
         assert len(skipped) == 1
@@ -316,11 +601,65 @@ class TestRunTestsForUrl:
 
     def test_dns_failure_skips_http_when_enabled(self):
         url = "http://x.com"
-        with patch("resource_availability.run_dns_test", return_value=self._dns_fail(url)):
+        with patch("resource_availability.run_dns_test", return_value=self._dns_fail(url)), \
+             patch("resource_availability.run_availability_test", return_value=self._avail_ok(url, "http")):
             results = run_tests_for_url(url, self._config(check_http=True, check_https=False))
         skipped = [r for r in results if r["skipped"]]
         assert len(skipped) == 1
 
+    def test_dns_failure_skips_both_when_enabled(self):
+        url = "https://x.com"
+        with patch("resource_availability.run_dns_test", return_value=self._dns_fail(url)), \
+             patch("resource_availability.run_availability_test", return_value=self._avail_ok(url, "https")):
+            results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        assert [r["case_name"] for r in results] == [
+            f"dns_resolution [{url}]", f"http_availability [{url}]", f"https_availability [{url}]",
+        ]
+        assert all(r["skipped"] for r in results[1:])
+
+    def test_availability_check_starts_while_dns_test_runs(self):
+        url = "https://example.com"
+        availability_started = threading.Event()
+        def slow_dns(url, hostname, system):
+            assert availability_started.wait(5)
+            return self._dns_ok(url)
+        def fake_avail(url, target_url, scheme, *args):
+            availability_started.set()
+            return self._avail_ok(url, scheme)
+        with patch("resource_availability.run_dns_test", side_effect=slow_dns), \
+             patch("resource_availability.run_availability_test", side_effect=fake_avail):
+            results = run_tests_for_url(url, self._config())
+        assert [r["case_name"] for r in results] == [f"dns_resolution [{url}]", f"https_availability [{url}]"]
+
+    def test_availability_check_waits_for_system_lookup(self, system_lookup):
+        url = "https://example.com"
+        resolved = threading.Event()
+        def slow_resolve(hostname):
+            time.sleep(0.05)
+            resolved.set()
+            return make_addrinfo("93.184.216.34")
+        system_lookup.side_effect = slow_resolve
+        def fake_avail(url, target_url, scheme, *args):
+            assert resolved.is_set()
+            return self._avail_ok(url, scheme)
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
+             patch("resource_availability.run_availability_test", side_effect=fake_avail) as mock_avail:
+            run_tests_for_url(url, self._config())
+        assert mock_avail.call_count == 1
+
+    def test_dns_test_and_availability_check_share_one_lookup(self, system_lookup):
+        url = "https://example.com"
+        system_lookup.side_effect = _resolve
+        def fake_check_url(target_url, *args, **kwargs):
+            # The connect resolves through _resolve, like _cached_create_connection
+            resource_availability._resolve("example.com")
+            return 200, target_url, 0.1, None, False
+        with patch("socket.getaddrinfo", return_value=make_addrinfo("93.184.216.34")) as mock_getaddrinfo, \
+             patch("resource_availability.check_url", side_effect=fake_check_url):
+            results = run_tests_for_url(url, self._config())
+        assert mock_getaddrinfo.call_count == 1
+        assert all(r["failure_message"] is None for r in results)
+
     def test_dns_success_runs_https(self):
         url = "https://example.com"
         with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
@@ -343,6 +682,75 @@ class TestRunTestsForUrl:
             results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
         assert len(results) == 3  # dns + http + https
 
+    def _avail_fail(self, url, scheme):
+        result = self._avail_ok(url, scheme)
+        result.update(failure_message=f"{scheme.upper()} availability check failed", failure_text="refused",
+                      status_code=None)
+        return result
+
+    def test_http_skipped_when_https_passes(self):
+        url = "https://example.com"
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
+             patch("resource_availability.run_availability_test", return_value=self._avail_ok(url, "https")) as mock_avail:
+            results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        assert [call.args[2] for call in mock_avail.call_args_list] == ["https"]
+        http_result = results[1]
+        assert http_result["case_name"] == f"http_availability [{url}]"
+        assert http_result["skipped"] is True
+        assert "HTTPS" in http_result["skipped_message"]
+
+    def test_http_runs_when_https_fails(self):
+        url = "https://example.com"
+        def fake(url, target_url, scheme, *args):
+            return self._avail_fail(url, scheme) if scheme == "https" else self._avail_ok(url, scheme)
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
+             patch("resource_availability.run_availability_test", side_effect=fake):
+            results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        assert [r["case_name"] for r in results] == [
+            f"dns_resolution [{url}]", f"http_availability [{url}]", f"https_availability [{url}]",
+        ]
+        assert not results[1]["skipped"]
+        assert results[2]["failure_message"] is not None
+
+    def test_http_runs_when_https_redirects_to_http(self):
+        url = "https://example.com"
+        def fake_check_url(target_url, *args, **kwargs):
+            if target_url.startswith("https://"):
+                return 301, "http://example.com/", 0.1, None, True
+            return 200, target_url, 0.1, None, False
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
+             patch("resource_availability.check_url", side_effect=fake_check_url) as mock_check:
+            results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        assert [call.args[0] for call in mock_check.call_args_list] == ["https://example.com", "http://example.com"]
+        assert not results[1]["skipped"]
+        assert results[1]["status_code"] == 200
+
+    def test_http_runs_when_https_is_not_2xx(self):
+        url = "https://example.com"
+        def fake(url, target_url, scheme, *args):
+            result = self._avail_ok(url, scheme)
+            if scheme == "https":
+                result["status_code"] = 304
+            return result
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)), \
+             patch("resource_availability.run_availability_test", side_effect=fake) as mock_avail:
+            results = run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        assert [call.args[2] for call in mock_avail.call_args_list] == ["https", "http"]
+        assert not results[1]["skipped"]
+
+    def test_scheme_variants_of_url_are_checked(self):
+        url = "https://example.com/path?q=1"
+        def fake(url, target_url, scheme, *args):
+            return self._avail_fail(url, scheme)
+        with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)) as mock_dns, \
+             patch("resource_availability.run_availability_test", side_effect=fake) as mock_avail:
+            run_tests_for_url(url, self._config(check_http=True, check_https=True))
+        mock_dns.assert_called_once_with(url, "example.com", ANY)
+        assert [call.args[1:3] for call in mock_avail.call_args_list] == [
+            ("https://example.com/path?q=1", "https"),
+            ("http://example.com/path?q=1", "http"),
+        ]
+
     def test_only_dns_when_both_checks_disabled(self):
         url = "https://example.com"
         with patch("resource_availability.run_dns_test", return_value=self._dns_ok(url)):
@@ -350,6 +758,42 @@ class TestRunTestsForUrl:
         assert len(results) == 1
 
 
+# ---------------------------------------------------------------------------
+# run_all
+# ---------------------------------------------------------------------------
+
+class TestRunAll:
+    def _config(self, urls, **overrides):
+        cfg = {"urls": urls, "concurrency": 4}
+        cfg.update(overrides)
+        return cfg
+
+    def _fake_run_tests_for_url(self, url, config):
+        return [{"case_name": f"dns_resolution [{url}]"}, {"case_name": f"https_availability [{url}]"}]
+
+    def test_results_flattened_in_url_order(self):
+        urls = [f"https://example{i}.com" for i in range(10)]
+        with patch("resource_availability.run_tests_for_url", side_effect=self._fake_run_tests_for_url):
+            results = run_all(self._config(urls))
+        assert [r["case_name"] for r in results] == [
+            name for url in urls
+            for name in (f"dns_resolution [{url}]", f"https_availability [{url}]")
+        ]
+
+    def test_each_url_receives_config(self):
+        config = self._config(["https://a.com", "https://b.com"], concurrency=1)
+        seen = []
+        def fake(url, cfg):
+            seen.append((url, cfg))
+            return []
+        with patch("resource_availability.run_tests_for_url", side_effect=fake):
+            run_all(config)
+        assert seen == [("https://a.com", config), ("https://b.com", config)]
+
+    def test_no_urls_returns_empty_list(self):
+        assert run_all(self._config([])) == []
+
+
 # ---------------------------------------------------------------------------
 # _parse_list_env
 # ---------------------------------------------------------------------------
@@ -376,6 +820,10 @@ class TestParseListEnv:
         monkeypatch.setenv("TEST_FOO", "not valid{{")
         assert _parse_list_env("TEST_FOO", ["default"]) == ["not valid{{"]
 
+    def test_returns_default_when_blank(self, monkeypatch):
+        monkeypatch.setenv("TEST_FOO", "  ")
+        assert _parse_list_env("TEST_FOO", ["a"]) == ["a"]
+
     def test_filters_empty_strings(self, monkeypatch):
         monkeypatch.setenv("TEST_FOO", "['a', '', 'b']")
         assert _parse_list_env("TEST_FOO", []) == ["a", "b"]
@@ -384,17 +832,58 @@ class TestParseListEnv:
         monkeypatch.setenv("TEST_FOO", "['https://a.com', '  https://b.com  ']")
         assert _parse_list_env("TEST_FOO", []) == ["https://a.com", "https://b.com"]
 
+    def test_filters_whitespace_only_and_non_string_values(self, monkeypatch):
+        monkeypatch.setenv("TEST_FOO", "['a', '   ', 3, None, ' b ']")
+        assert _parse_list_env("TEST_FOO", []) == ["a", "b"]
+
     def test_non_list_type_falls_back_to_default(self, monkeypatch):
         monkeypatch.setenv("TEST_FOO", "42")
         assert _parse_list_env("TEST_FOO", ["default"]) == ["default"]
 
 
+# ---------------------------------------------------------------------------
+# _parse_int_env / _parse_bool_env
+# ---------------------------------------------------------------------------
+
+class TestParseIntEnv:
+    def test_returns_default_when_not_set(self, monkeypatch):
+        monkeypatch.delenv("TEST_FOO", raising=False)
+        assert _parse_int_env("TEST_FOO", 7) == 7
+
+    def test_blank_value_returns_default(self, monkeypatch, capsys):
+        monkeypatch.setenv("TEST_FOO", "  ")
+        assert _parse_int_env("TEST_FOO", 7) == 7
+        assert capsys.readouterr().err == ""
+
+    def test_parses_integer(self, monkeypatch):
+        monkeypatch.setenv("TEST_FOO", " 12 ")
+        assert _parse_int_env("TEST_FOO", 7) == 12
+
+
+class TestParseBoolEnv:
+    @pytest.mark.parametrize("raw", ["true", "TRUE", "1", "yes", "on", " True "])
+    def test_truthy_values(self, monkeypatch, raw):
+        monkeypatch.setenv("TEST_FOO", raw)
+        assert _parse_bool_env("TEST_FOO", False) is True
+
+    @pytest.mark.parametrize("raw", ["false", "0", "no", "off", "nonsense"])
+    def test_other_values_are_false(self, monkeypatch, raw):
+        monkeypatch.setenv("TEST_FOO", raw)
+        assert _parse_bool_env("TEST_FOO", True) is False
+
+    def test_unset_or_blank_returns_default(self, monkeypatch):
+        monkeypatch.delenv("TEST_FOO", raising=False)
+        assert _parse_bool_env("TEST_FOO", True) is True
+        monkeypatch.setenv("TEST_FOO", "")
+        assert _parse_bool_env("TEST_FOO", True) is True
+
+
 # ---------------------------------------------------------------------------
 # parse_config
 # ---------------------------------------------------------------------------
 
 class TestParseConfig:
-    ENV_KEYS = ["TEST_URLS", "TEST_TIMEOUT", "TEST_MAX-REDIRECTS",
+    ENV_KEYS = ["TEST_URLS", "TEST_TIMEOUT", "TEST_MAX-REDIRECTS", "TEST_CONCURRENCY",
                 "TEST_CHECK-HTTP-AVAILABILITY", "TEST_CHECK-HTTPS-AVAILABILITY",
                 "TEST_VERIFY-SSL", "SPECIAL_SOURCE_FILE", "SPECIAL_CREATE_ISSUE"]
 
@@ -408,6 +897,7 @@ class TestParseConfig:
         assert config["urls"] == []
         assert config["timeout"] == 30
         assert config["max_redirects"] == 0
+        assert config["concurrency"] == 10
         assert config["check_http"] is False
         assert config["check_https"] is True
         assert config["verify_ssl"] is True
@@ -458,10 +948,22 @@ class TestParseConfig:
         monkeypatch.setenv("TEST_MAX-REDIRECTS", "not-a-number")
         assert parse_config()["max_redirects"] == 0
 
+    def test_blank_max_redirects_falls_back_to_default(self, monkeypatch):
+        monkeypatch.setenv("TEST_MAX-REDIRECTS", "")
+        assert parse_config()["max_redirects"] == 0
+
     def test_negative_max_redirects_falls_back_to_default(self, monkeypatch):
         monkeypatch.setenv("TEST_MAX-REDIRECTS", "-1")
         assert parse_config()["max_redirects"] == 0
 
+    def test_custom_concurrency(self, monkeypatch):
+        monkeypatch.setenv("TEST_CONCURRENCY", "4")
+        assert parse_config()["concurrency"] == 4
+
+    def test_zero_concurrency_falls_back_to_default(self, monkeypatch):
+        monkeypatch.setenv("TEST_CONCURRENCY", "0")
+        assert parse_config()["concurrency"] == 10
+
     def test_provenance_from_env(self, monkeypatch):
         monkeypatch.setenv("SPECIAL_SOURCE_FILE", "my-config.yaml")
         assert parse_config()["provenance"] == "my-config.yaml"
@@ -537,6 +1039,7 @@ class TestCreateJunitReport:
         suite_props = {
             "timeout": 60,
             "max_redirects": 3,
+            "concurrency": 5,
             "check_http": True,
             "check_https": False,
             "verify_ssl": False,
@@ -546,6 +1049,7 @@ class TestCreateJunitReport:
         xml_content = open(out).read()
         assert 'name="timeout" value="60"' in xml_content
         assert 'name="max-redirects" value="3"' in xml_content
+        assert 'name="concurrency" value="5"' in xml_content
         assert 'name="check-http-availability" value="true"' in xml_content
         assert 'name="check-https-availability" value="false"' in xml_content
         assert 'name="verify-ssl" value="false"' in xml_content
@@ -556,6 +1060,7 @@ class TestCreateJunitReport:
         xml_content = open(out).read()
         assert 'name="timeout"' not in xml_content
         assert 'name="max-redirects"' not in xml_content
+        assert 'name="concurrency"' not in xml_content
         assert 'name="check-http-availability"' not in xml_content
         assert 'name="check-https-availability"' not in xml_content
         assert 'name="verify-ssl"' not in xml_content
@@ -584,6 +1089,16 @@ class TestCreateJunitReport:
         assert 'name="hostnames"' in content
         assert 'value="example.com"' in content
 
+    def test_regular_property_keeps_first_value(self, tmp_path):
+        out = str(tmp_path / "report.xml")
+        first, second = self._result("t1"), self._result("t2")
+        first["properties"] = {"verify_ssl": "True"}
+        second["properties"] = {"verify_ssl": "False"}
+        create_junit_report("suite", [first, second], out, set(), "prov")
+        content = open(out).read()
+        assert content.count('name="verify_ssl"') == 1
+        assert 'name="verify_ssl" value="True"' in content
+
     def test_suite_time_equals_sum_of_durations(self, tmp_path):
         from junitparser import JUnitXml as JX
         out = str(tmp_path / "report.xml")
@@ -593,6 +1108,23 @@ class TestCreateJunitReport:
         for suite in xml:
             assert abs(suite.time - 1.0) < 0.001
 
+    def test_suite_counts_match_results(self, tmp_path):
+        from junitparser import JUnitXml as JX
+        out = str(tmp_path / "report.xml")
+        results = [self._result("ok"), self._result("f", failure=True),
+                   self._result("e", error=True), self._result("s", skipped=True)]
+        create_junit_report("suite", results, out, set(), "prov")
+        for suite in JX.fromfile(out):
+            assert (suite.tests, suite.failures, suite.errors, suite.skipped) == (4, 1, 1, 1)
+
+    def test_overwrites_existing_report(self, tmp_path):
+        out = tmp_path / "report.xml"
+        out.write_text("x" * 100000)
+        create_junit_report("suite", [self._result()], str(out), set(), "prov")
+        content = out.read_text()
+        assert content.startswith("<?xml")
+        assert content.rstrip().endswith("</testsuites>")
+
     def test_empty_results_still_creates_file(self, tmp_path):
         out = str(tmp_path / "report.xml")
         create_junit_report("suite", [], out, set(), "prov")